@@ -8,26 +8,88 @@ Description: Analyse un répertoire et produit un rapport détaillé
 import os
 import sys
 import argparse
-from pathlib import Path
+import heapq
+import json
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 
+# Libellé des fichiers sans extension (interné comme les extensions)
+_NO_EXT = sys.intern('sans extension')
+
+# Unités de taille, indexées par puissance de 1024
+_SIZE_UNITS = ('o', 'Ko', 'Mo', 'Go', 'To', 'Po')
+
+# Nombre de fichiers entre deux affichages de la progression
+_PROGRESS_STEP = 16384
+_PROGRESS_MASK = _PROGRESS_STEP - 1
+
+# Emplacement par défaut du cache des analyses (option --cache)
+_DEFAULT_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'directory_analyzer.json')
+
+
+class _ScanStats:
+    """Compteurs propres à un thread de parcours, fusionnés en fin d'analyse"""
+    
+    __slots__ = ('total_files', 'total_directories', 'total_size',
+                 'file_types', 'largest_files')
+    
+    def __init__(self):
+        self.total_files = 0
+        self.total_directories = 0
+        self.total_size = 0
+        self.file_types = defaultdict(int)
+        self.largest_files = []
+
+
 class DirectoryAnalyzer:
     """Classe pour analyser un répertoire système"""
     
-    def __init__(self, directory_path):
+    __slots__ = ('directory_path', 'max_workers', 'cache_path', 'use_blocks',
+                 'total_files', 'total_directories', 'total_size', 'file_types',
+                 '_top_n', 'largest_files', '_progress', '_detailed')
+    
+    def __init__(self, directory_path, max_workers=None, cache_path=None,
+                 use_blocks=False, top_n=10):
         """
         Initialise l'analyseur avec le chemin du répertoire
         
         Args:
             directory_path (str): Chemin du répertoire à analyser
+            max_workers (int): Nombre de threads de parcours, soit le nombre
+                d'appels système en vol (défaut: min(32, 4 x nb de CPU))
+            cache_path (str): Fichier de cache des analyses précédentes
+                (désactivé si None)
+            use_blocks (bool): Mesurer l'espace disque alloué (st_blocks)
+                plutôt que la taille logique des fichiers (st_size)
+            top_n (int): Nombre de plus gros fichiers conservés pendant
+                l'analyse, maximum accepté par get_top_files
+                
+        Raises:
+            ValueError: Si top_n est inférieur à 1
         """
-        self.directory_path = Path(directory_path)
+        if top_n < 1:
+            raise ValueError(f"top_n doit être au moins égal à 1 (reçu: {top_n})")
+        
+        self.directory_path = os.fspath(directory_path)
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        self.cache_path = cache_path
+        self.use_blocks = use_blocks
         self.total_files = 0
         self.total_directories = 0
         self.total_size = 0
-        self.file_types = {}
+        self.file_types = defaultdict(int)
+        # Tas-min borné aux _top_n plus gros fichiers : (taille, chemin)
+        self._top_n = top_n
         self.largest_files = []
+        # Rappel de progression (nombre de fichiers analysés), actif
+        # uniquement pendant analyze_directory sur un terminal
+        self._progress = None
+        # Détails (extensions, plus gros fichiers) collectés par la dernière
+        # analyse : None tant qu'aucune analyse n'a eu lieu
+        self._detailed = None
         
     def validate_directory(self):
         """
@@ -36,12 +98,11 @@ class DirectoryAnalyzer:
         Returns:
             bool: True si valide, False sinon
         """
-        if not self.directory_path.exists():
-            print(f"Erreur: Le répertoire '{self.directory_path}' n'existe pas.")
-            return False
-            
-        if not self.directory_path.is_dir():
-            print(f"Erreur: '{self.directory_path}' n'est pas un répertoire.")
+        if not os.path.isdir(self.directory_path):
+            if not os.path.exists(self.directory_path):
+                print(f"Erreur: Le répertoire '{self.directory_path}' n'existe pas.")
+            else:
+                print(f"Erreur: '{self.directory_path}' n'est pas un répertoire.")
             return False
             
         if not os.access(self.directory_path, os.R_OK):
@@ -60,60 +121,506 @@ class DirectoryAnalyzer:
         Returns:
             str: Taille formatée (ex: "1.5 MB")
         """
-        for unit in ['o', 'Ko', 'Mo', 'Go', 'To']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.2f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.2f} Po"
+        # L'indice de l'unité se lit directement sur le nombre de bits
+        unit_idx = min(max(0, (int(size_bytes).bit_length() - 1) // 10), 5)
+        return f"{size_bytes / (1 << (10 * unit_idx)):.2f} {_SIZE_UNITS[unit_idx]}"
     
-    def analyze_directory(self):
+    def analyze_directory(self, verbose=True):
         """
         Analyse le contenu du répertoire de manière récursive
+        
+        Chaque sous-répertoire est parcouru par un pool de threads : les
+        appels système (getdents, stat) libèrent le GIL et peuvent donc
+        être émis en parallèle. Chaque thread accumule ses statistiques
+        dans un _ScanStats local, fusionné une fois le parcours terminé.
+        
+        Si un cache est configuré, les répertoires inchangés (inode, mtime,
+        ctime) depuis l'analyse précédente ne sont pas relus.
+        
+        Sur un terminal, le nombre de fichiers déjà analysés est affiché
+        sur stderr tous les _PROGRESS_STEP fichiers, y compris au milieu
+        d'un répertoire très peuplé.
+        
+        Une exception levée dans un thread de parcours (hors OSError,
+        gérée fichier par fichier) interrompt l'analyse et est relancée
+        ici : des totaux partiels ne sont jamais présentés comme complets.
+        
+        Args:
+            verbose (bool): Collecter aussi les extensions et les plus gros
+                fichiers ; sinon seuls les totaux sont calculés
         """
+        scan_directory = self._scan_directory if verbose else self._scan_totals
+        cache = self._load_cache() if self.cache_path else None
+        new_cache = {}
+        # Avec le cache, le parcours se fait en chemins absolus : les
+        # enregistrements (clés, sous-répertoires, plus gros fichiers) restent
+        # valables quel que soit le répertoire courant ou l'orthographe du chemin
+        root = os.path.abspath(self.directory_path) if cache is not None else self.directory_path
+        local = threading.local()
+        all_stats = []
+        lock = threading.Lock()
+        done = threading.Event()
+        # Nombre de répertoires soumis mais pas encore parcourus
+        pending = [1]
+        # Première exception levée par un thread de parcours
+        errors = []
+        # Nombre de fichiers analysés, pour l'affichage de la progression
+        progress = sys.stderr.isatty()
+        scanned = [0]
+        
+        def add_progress(count):
+            with lock:
+                before = scanned[0]
+                scanned[0] += count
+                if before // _PROGRESS_STEP != scanned[0] // _PROGRESS_STEP:
+                    sys.stderr.write(f"\r{scanned[0]:,} fichiers analysés...")
+                    sys.stderr.flush()
+        
+        self._progress = add_progress if progress else None
+        
         try:
-            for root, dirs, files in os.walk(self.directory_path):
-                # Compte les sous-répertoires
-                self.total_directories += len(dirs)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
                 
-                # Analyse chaque fichier
-                for filename in files:
-                    file_path = Path(root) / filename
-                    
+                def scan(path):
+                    try:
+                        if errors:
+                            # Analyse interrompue : les tâches restantes sont vidées
+                            return
+                        
+                        stats = getattr(local, 'stats', None)
+                        if stats is None:
+                            stats = local.stats = _ScanStats()
+                            with lock:
+                                all_stats.append(stats)
+                        
+                        if cache is None:
+                            subdirs, _ = scan_directory(path, stats)
+                        else:
+                            subdirs = self._scan_cached(path, stats, cache, new_cache,
+                                                        scan_directory, verbose)
+                        
+                        with lock:
+                            pending[0] += len(subdirs)
+                        for subdir in subdirs:
+                            executor.submit(scan, subdir)
+                    except BaseException as e:
+                        with lock:
+                            if not errors:
+                                errors.append(e)
+                            done.set()
+                    finally:
+                        with lock:
+                            pending[0] -= 1
+                            if pending[0] == 0:
+                                done.set()
+                
+                executor.submit(scan, root)
+                try:
+                    done.wait()
+                except BaseException as e:
+                    # Interruption (Ctrl-C) : les tâches restantes sont vidées
+                    # avant que le pool n'attende la fin des threads
+                    with lock:
+                        if not errors:
+                            errors.append(e)
+                    raise
+        finally:
+            # Le rappel de progression (qui référence le verrou et le compteur
+            # de cette analyse) ne doit pas survivre à l'analyse, et la ligne
+            # de progression est terminée avant tout message d'erreur
+            self._progress = None
+            if progress and scanned[0] >= _PROGRESS_STEP:
+                sys.stderr.write("\n")
+        
+        if errors:
+            raise errors[0]
+        
+        # Fusion des statistiques de chaque thread
+        for stats in all_stats:
+            self._merge_stats(self, stats)
+        self._detailed = verbose
+        
+        if cache is not None:
+            self._save_cache(self._update_cache(cache, new_cache, root))
+    
+    def _merge_stats(self, target, source):
+        """
+        Ajoute les compteurs de source à ceux de target
+        
+        Args:
+            target: Objet recevant les compteurs (analyseur ou _ScanStats)
+            source (_ScanStats): Compteurs à ajouter
+        """
+        target.total_files += source.total_files
+        target.total_directories += source.total_directories
+        target.total_size += source.total_size
+        for extension, count in source.file_types.items():
+            target.file_types[extension] += count
+        for item in source.largest_files:
+            self._push_largest(target.largest_files, item)
+    
+    def _load_cache(self):
+        """
+        Charge le cache des analyses précédentes
+        
+        Returns:
+            dict: Enregistrements par chemin de répertoire (vide si absent
+                ou illisible)
+        """
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cache if isinstance(cache, dict) else {}
+    
+    def _update_cache(self, cache, new_cache, root):
+        """
+        Fusionne les résultats de l'analyse dans le cache chargé
+        
+        Les enregistrements hors de root (analyses d'autres répertoires)
+        sont conservés ; ceux situés sous root et non revus pendant cette
+        analyse (répertoires supprimés ou illisibles) sont retirés.
+        
+        Args:
+            cache (dict): Cache chargé au début de l'analyse
+            new_cache (dict): Enregistrements produits par cette analyse
+            root (str): Chemin absolu du répertoire analysé
+            
+        Returns:
+            dict: Cache à enregistrer
+        """
+        prefix = root if root.endswith(os.sep) else root + os.sep
+        merged = {
+            path: record for path, record in cache.items()
+            if path != root and not path.startswith(prefix)
+        }
+        merged.update(new_cache)
+        return merged
+    
+    def _save_cache(self, cache):
+        """
+        Enregistre le cache (écriture atomique via un fichier temporaire)
+        
+        Args:
+            cache (dict): Enregistrements par chemin de répertoire
+        """
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            print(f"Avertissement: Impossible d'écrire le cache '{self.cache_path}'")
+    
+    def _scan_cached(self, path, stats, cache, new_cache, scan_directory, verbose):
+        """
+        Parcourt un répertoire en réutilisant le cache si possible
+        
+        Un répertoire est repris du cache lorsque son inode, son mtime et
+        son ctime sont inchangés : aucune entrée n'y a été créée, supprimée
+        ni renommée, et ses droits n'ont pas changé. Seul son contenu
+        direct est mis en cache, ses sous-répertoires restant vérifiés un
+        par un. Un répertoire lu avec des erreurs (droits insuffisants...)
+        n'est pas mis en cache. Un fichier modifié sur place ne change pas
+        le mtime du répertoire : sa taille peut alors être périmée.
+        
+        Args:
+            path (str): Répertoire à parcourir
+            stats (_ScanStats): Compteurs du thread courant
+            cache (dict): Cache de l'analyse précédente
+            new_cache (dict): Cache en cours de construction
+            scan_directory: Méthode de parcours à utiliser en cas d'absence
+            verbose (bool): Les détails (extensions, plus gros fichiers)
+                sont requis ; un enregistrement sans détails est alors ignoré
+            
+        Returns:
+            list: Chemins des sous-répertoires à parcourir ensuite
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return []
+        key = [st.st_dev, st.st_ino, st.st_mtime_ns, st.st_ctime_ns,
+               self.use_blocks, self._top_n]
+        
+        record = cache.get(path)
+        dir_stats = self._stats_from_record(record, key, verbose)
+        if dir_stats is not None:
+            subdirs = record['subdirs']
+            new_cache[path] = record
+            if self._progress is not None:
+                self._progress(dir_stats.total_files)
+        else:
+            dir_stats = _ScanStats()
+            subdirs, complete = scan_directory(path, dir_stats)
+            # Un résultat incomplet n'est pas mémorisé : il serait sinon
+            # réutilisé une fois le répertoire redevenu lisible
+            if complete:
+                new_cache[path] = {
+                    'key': key,
+                    'detailed': verbose,
+                    'files': dir_stats.total_files,
+                    'size': dir_stats.total_size,
+                    'types': dir_stats.file_types,
+                    'largest': dir_stats.largest_files,
+                    'subdirs': subdirs,
+                }
+        
+        self._merge_stats(stats, dir_stats)
+        return subdirs
+    
+    def _stats_from_record(self, record, key, verbose):
+        """
+        Reconstruit les compteurs d'un répertoire depuis le cache
+        
+        Args:
+            record: Enregistrement lu dans le cache (peut être absent ou
+                mal formé)
+            key (list): Clé attendue (dev, inode, mtime, ctime, --blocks,
+                taille du top)
+            verbose (bool): Les détails sont requis
+            
+        Returns:
+            _ScanStats: Compteurs du répertoire, ou None si l'enregistrement
+                est absent, périmé ou mal formé (le répertoire est alors relu)
+        """
+        try:
+            if not isinstance(record, dict):
+                return None
+            if record['key'] != key or not (record['detailed'] or not verbose):
+                return None
+            
+            # Vérifie le type des conteneurs avant leur contenu : une chaîne
+            # passerait sinon pour une liste de sous-répertoires d'un caractère
+            subdirs = record['subdirs']
+            if (not isinstance(subdirs, list)
+                    or not isinstance(record['types'], dict)
+                    or not isinstance(record['largest'], list)):
+                return None
+            if not all(isinstance(subdir, str) and os.path.isabs(subdir)
+                       for subdir in subdirs):
+                return None
+            
+            dir_stats = _ScanStats()
+            dir_stats.total_files = int(record['files'])
+            dir_stats.total_directories = len(subdirs)
+            dir_stats.total_size = int(record['size'])
+            for extension, count in record['types'].items():
+                dir_stats.file_types[sys.intern(extension)] = int(count)
+            for size, file_path in record['largest']:
+                if not isinstance(file_path, str):
+                    return None
+                dir_stats.largest_files.append((int(size), file_path))
+            heapq.heapify(dir_stats.largest_files)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return None
+        
+        return dir_stats
+    
+    def _push_largest(self, heap, item):
+        """
+        Ajoute un fichier au tas borné des plus gros fichiers
+        
+        Args:
+            heap (list): Tas-min de (taille, chemin)
+            item (tuple): Couple (taille, chemin) à insérer
+        """
+        if len(heap) < self._top_n:
+            heapq.heappush(heap, item)
+        elif item[0] > heap[0][0]:
+            heapq.heapreplace(heap, item)
+    
+    def _scan_totals(self, path, stats):
+        """
+        Parcourt un seul répertoire en ne calculant que les totaux
+        
+        Variante de _scan_directory pour le mode non verbeux : ni tas des
+        plus gros fichiers, ni comptage des extensions.
+        
+        Args:
+            path (str): Répertoire à parcourir
+            stats (_ScanStats): Compteurs du thread courant
+            
+        Returns:
+            tuple: (sous-répertoires à parcourir ensuite, True si le
+                répertoire a été lu sans erreur)
+        """
+        subdirs = []
+        complete = True
+        
+        try:
+            dir_fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return subdirs, False
+        
+        # Noms utilisés dans la boucle liés en variables locales
+        files = dirs = size = 0
+        add_subdir = subdirs.append
+        join = os.path.join
+        use_blocks = self.use_blocks
+        progress = self._progress
+        mask = _PROGRESS_MASK
+        
+        try:
+            with os.scandir(dir_fd) as entries:
+                for entry in entries:
                     try:
-                        # Compte les fichiers
-                        self.total_files += 1
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs += 1
+                            add_subdir(join(path, entry.name))
+                        else:
+                            files += 1
+                            if not files & mask and progress is not None:
+                                progress(_PROGRESS_STEP)
+                            if entry.is_file(follow_symlinks=False):
+                                st = entry.stat(follow_symlinks=False)
+                                size += st.st_blocks * 512 if use_blocks else st.st_size
+                    except OSError:
+                        complete = False
+        except OSError:
+            complete = False
+        finally:
+            os.close(dir_fd)
+        
+        if progress is not None:
+            progress(files & mask)
+        stats.total_files += files
+        stats.total_directories += dirs
+        stats.total_size += size
+        return subdirs, complete
+    
+    def _scan_directory(self, path, stats):
+        """
+        Parcourt un seul répertoire (sans récursion)
+        
+        Args:
+            path (str): Répertoire à parcourir
+            stats (_ScanStats): Compteurs du thread courant
+            
+        Returns:
+            tuple: (sous-répertoires à parcourir ensuite, True si le
+                répertoire a été lu sans erreur)
+        """
+        subdirs = []
+        complete = True
+        
+        # Le répertoire est ouvert une fois et parcouru via son descripteur :
+        # les stat des entrées deviennent des fstatat(dir_fd, nom), qui ne
+        # résolvent plus tout le chemin (ni ses contrôles LSM) à chaque fois.
+        # Les DirEntry ne portent alors que leur nom, d'où les os.path.join.
+        try:
+            dir_fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            # Ignore les répertoires inaccessibles, comme le faisait os.walk
+            return subdirs, False
+        
+        # Les compteurs et les noms utilisés pour chaque entrée sont liés en
+        # variables locales (LOAD_FAST) et reportés dans stats à la fin
+        files = dirs = size = 0
+        file_types = stats.file_types
+        largest = stats.largest_files
+        top_n = self._top_n
+        push_largest = self._push_largest
+        add_subdir = subdirs.append
+        join = os.path.join
+        intern = sys.intern
+        use_blocks = self.use_blocks
+        progress = self._progress
+        mask = _PROGRESS_MASK
+        
+        try:
+            with os.scandir(dir_fd) as entries:
+                for entry in entries:
+                    try:
+                        name = entry.name
+                        
+                        # Sous-répertoire : à parcourir ensuite
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs += 1
+                            add_subdir(join(path, name))
+                            continue
                         
-                        # Calcule la taille
-                        if file_path.is_file() and not file_path.is_symlink():
-                            file_size = file_path.stat().st_size
-                            self.total_size += file_size
-                            
-                            # Garde trace des plus gros fichiers
-                            self.largest_files.append((str(file_path), file_size))
-                            
-                            # Analyse les types de fichiers
-                            extension = file_path.suffix.lower() or 'sans extension'
-                            self.file_types[extension] = self.file_types.get(extension, 0) + 1
-                            
-                    except (OSError, PermissionError) as e:
+                        # Compte les fichiers (et signale la progression tous
+                        # les _PROGRESS_STEP fichiers, même dans un répertoire
+                        # très peuplé)
+                        files += 1
+                        if not files & mask and progress is not None:
+                            progress(_PROGRESS_STEP)
+                        
+                        # Calcule la taille des seuls fichiers réguliers (liens
+                        # symboliques et fichiers spéciaux exclus). Sous Linux,
+                        # is_dir/is_file lisent le d_type renvoyé par getdents,
+                        # sans appel système : seul le stat qui donne la taille
+                        # en coûte un. Si le système de fichiers renvoie
+                        # DT_UNKNOWN, DirEntry fait un lstat unique et le met
+                        # en cache pour les appels suivants.
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        
+                        # Taille logique, ou espace alloué (blocs de 512
+                        # octets) avec --blocks : même stat dans les deux cas
+                        st = entry.stat(follow_symlinks=False)
+                        file_size = st.st_blocks * 512 if use_blocks else st.st_size
+                        size += file_size
+                        
+                        # Garde trace des plus gros fichiers : la plupart des
+                        # fichiers sont écartés sans appel de méthode
+                        if len(largest) < top_n or file_size > largest[0][0]:
+                            push_largest(largest, (file_size, join(path, name)))
+                        
+                        # Analyse les types de fichiers (même règle que
+                        # PurePath.suffix, sans construire de Path). Les
+                        # extensions sont peu nombreuses : on les interne
+                        # pour ne garder qu'une copie de chacune.
+                        i = name.rfind('.')
+                        if 0 < i < len(name) - 1:
+                            extension = intern(name[i:].lower())
+                        else:
+                            extension = _NO_EXT
+                        file_types[extension] += 1
+                        
+                    except OSError:
                         # Ignore les fichiers inaccessibles
-                        continue
+                        complete = False
                         
-        except PermissionError as e:
-            print(f"Avertissement: Permissions insuffisantes pour certains fichiers/répertoires")
+        except OSError:
+            # Ignore les répertoires devenus illisibles en cours de lecture
+            complete = False
+        finally:
+            os.close(dir_fd)
+        
+        if progress is not None:
+            progress(files & mask)
+        stats.total_files += files
+        stats.total_directories += dirs
+        stats.total_size += size
+        return subdirs, complete
     
     def get_top_files(self, n=10):
         """
         Retourne les N plus gros fichiers
         
+        Seuls les top_n plus gros fichiers (voir __init__) sont conservés
+        pendant l'analyse : n ne peut pas dépasser cette valeur.
+        
         Args:
             n (int): Nombre de fichiers à retourner
             
         Returns:
             list: Liste des (chemin, taille) des plus gros fichiers
+            
+        Raises:
+            ValueError: Si n est supérieur à top_n
         """
-        self.largest_files.sort(key=lambda x: x[1], reverse=True)
-        return self.largest_files[:n]
+        if n > self._top_n:
+            raise ValueError(
+                f"Seuls les {self._top_n} plus gros fichiers sont conservés "
+                f"(top_n={self._top_n}), impossible d'en retourner {n}"
+            )
+        top = heapq.nlargest(n, self.largest_files)
+        return [(path, size) for size, path in top]
     
     def get_top_extensions(self, n=10):
         """
@@ -125,8 +632,7 @@ class DirectoryAnalyzer:
         Returns:
             list: Liste des (extension, count) triée par fréquence
         """
-        sorted_types = sorted(self.file_types.items(), key=lambda x: x[1], reverse=True)
-        return sorted_types[:n]
+        return heapq.nlargest(n, self.file_types.items(), key=lambda x: x[1])
     
     def generate_report(self, verbose=False):
         """
@@ -134,74 +640,91 @@ class DirectoryAnalyzer:
         
         Args:
             verbose (bool): Afficher les détails supplémentaires
+            
+        Raises:
+            ValueError: Si les détails sont demandés alors que l'analyse a
+                été faite avec analyze_directory(verbose=False)
         """
-        print("=" * 70)
-        print(" " * 15 + "RAPPORT D'ANALYSE DE REPERTOIRE")
-        print("=" * 70)
-        print()
+        if verbose and self._detailed is False:
+            raise ValueError(
+                "Détails non collectés : appeler analyze_directory(verbose=True) "
+                "avant generate_report(verbose=True)"
+            )
+        
+        # Le rapport est assemblé puis écrit en une seule fois
+        lines = []
+        
+        lines.append("=" * 70)
+        lines.append(" " * 15 + "RAPPORT D'ANALYSE DE REPERTOIRE")
+        lines.append("=" * 70)
+        lines.append("")
         
         # Informations générales
-        print(f"Répertoire analysé : {self.directory_path.absolute()}")
-        print(f"Date d'analyse     : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print()
+        lines.append(f"Répertoire analysé : {os.path.abspath(self.directory_path)}")
+        lines.append(f"Date d'analyse     : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        if self.use_blocks:
+            lines.append("Tailles mesurées   : espace disque alloué (--blocks)")
+        lines.append("")
         
         # Statistiques principales
-        print("-" * 70)
-        print("STATISTIQUES GENERALES")
-        print("-" * 70)
-        print(f"Nombre total de fichiers      : {self.total_files:,}")
-        print(f"Nombre de sous-répertoires    : {self.total_directories:,}")
-        print(f"Taille totale occupée         : {self.get_size_readable(self.total_size)}")
-        print(f"                                 ({self.total_size:,} octets)")
+        lines.append("-" * 70)
+        lines.append("STATISTIQUES GENERALES")
+        lines.append("-" * 70)
+        lines.append(f"Nombre total de fichiers      : {self.total_files:,}")
+        lines.append(f"Nombre de sous-répertoires    : {self.total_directories:,}")
+        lines.append(f"Taille totale occupée         : {self.get_size_readable(self.total_size)}")
+        lines.append(f"                                 ({self.total_size:,} octets)")
         
         if self.total_files > 0:
             avg_size = self.total_size / self.total_files
-            print(f"Taille moyenne par fichier    : {self.get_size_readable(avg_size)}")
+            lines.append(f"Taille moyenne par fichier    : {self.get_size_readable(avg_size)}")
         
-        print()
+        lines.append("")
         
         # Détails supplémentaires en mode verbose
         if verbose:
             # Types de fichiers les plus fréquents
             if self.file_types:
-                print("-" * 70)
-                print("TYPES DE FICHIERS LES PLUS FREQUENTS")
-                print("-" * 70)
-                print(f"{'Extension':<20} {'Nombre':<15} {'Pourcentage'}")
-                print("-" * 70)
+                lines.append("-" * 70)
+                lines.append("TYPES DE FICHIERS LES PLUS FREQUENTS")
+                lines.append("-" * 70)
+                lines.append(f"{'Extension':<20} {'Nombre':<15} {'Pourcentage'}")
+                lines.append("-" * 70)
                 
                 top_extensions = self.get_top_extensions(10)
                 for ext, count in top_extensions:
                     percentage = (count / self.total_files) * 100
-                    print(f"{ext:<20} {count:<15,} {percentage:>6.2f}%")
-                print()
+                    lines.append(f"{ext:<20} {count:<15,} {percentage:>6.2f}%")
+                lines.append("")
             
             # Plus gros fichiers
-            top_files = self.get_top_files(10)
+            top_files = self.get_top_files(min(10, self._top_n))
             if top_files:
-                print("-" * 70)
-                print("LES 10 FICHIERS LES PLUS VOLUMINEUX")
-                print("-" * 70)
-                print(f"{'Taille':<15} {'Chemin'}")
-                print("-" * 70)
+                lines.append("-" * 70)
+                lines.append(f"LES {len(top_files)} FICHIERS LES PLUS VOLUMINEUX")
+                lines.append("-" * 70)
+                lines.append(f"{'Taille':<15} {'Chemin'}")
+                lines.append("-" * 70)
                 
                 for file_path, size in top_files:
-                    print(f"{self.get_size_readable(size):<15} {file_path}")
-                print()
+                    lines.append(f"{self.get_size_readable(size):<15} {file_path}")
+                lines.append("")
         
         # Résumé final
-        print("-" * 70)
-        print("RESUME")
-        print("-" * 70)
+        lines.append("-" * 70)
+        lines.append("RESUME")
+        lines.append("-" * 70)
         
         if self.total_files == 0:
-            print("Le répertoire est vide (aucun fichier trouvé).")
+            lines.append("Le répertoire est vide (aucun fichier trouvé).")
         else:
-            print(f"Le répertoire contient {self.total_files:,} fichier(s)")
-            print(f"répartis dans {self.total_directories:,} sous-répertoire(s)")
-            print(f"pour un total de {self.get_size_readable(self.total_size)}.")
+            lines.append(f"Le répertoire contient {self.total_files:,} fichier(s)")
+            lines.append(f"répartis dans {self.total_directories:,} sous-répertoire(s)")
+            lines.append(f"pour un total de {self.get_size_readable(self.total_size)}.")
+        
+        lines.append("=" * 70)
         
-        print("=" * 70)
+        sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main():
@@ -231,11 +754,46 @@ Exemples d'utilisation:
         help='Afficher les détails supplémentaires (types de fichiers, plus gros fichiers)'
     )
     
+    parser.add_argument(
+        '-j', '--workers',
+        type=int,
+        default=None,
+        help='Nombre de threads de parcours (augmenter sur NFS ou disques lents)'
+    )
+    
+    parser.add_argument(
+        '--blocks',
+        action='store_true',
+        help='Mesurer l\'espace disque réellement alloué (comme du) plutôt '
+             'que la taille des fichiers'
+    )
+    
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help='Réutiliser les résultats des répertoires inchangés depuis la '
+             'dernière analyse (même inode, mtime et ctime, mêmes options '
+             '--blocks et taille du top) ; un fichier modifié sur place '
+             'n\'est pas détecté'
+    )
+    
+    parser.add_argument(
+        '--cache-file',
+        default=None,
+        metavar='FICHIER',
+        help=f'Fichier de cache à utiliser (implique --cache, '
+             f'défaut: {_DEFAULT_CACHE})'
+    )
+    
     # Parse les arguments
     args = parser.parse_args()
     
     # Création de l'analyseur
-    analyzer = DirectoryAnalyzer(args.directory)
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers doit être un entier strictement positif")
+    cache_path = args.cache_file or (_DEFAULT_CACHE if args.cache else None)
+    analyzer = DirectoryAnalyzer(args.directory, max_workers=args.workers,
+                                 cache_path=cache_path, use_blocks=args.blocks)
     
     # Validation du répertoire
     if not analyzer.validate_directory():
@@ -243,7 +801,7 @@ Exemples d'utilisation:
     
     # Analyse du répertoire
     print(f"Analyse du répertoire en cours...")
-    analyzer.analyze_directory()
+    analyzer.analyze_directory(verbose=args.verbose)
     print()
     
     # Génération du rapport